@@ -1,13 +1,43 @@
-from gym.envs.registration import register
+import importlib.util
+import os
+import sys
 
-register(
-    id='GreaterThanZero-v0',
-    entry_point='gym_dummy.envs.fobs:GreaterThanZeroEnv')
 
-register(
-    id='NotXOR-v0',
-    entry_point='gym_dummy.envs.fobs:NotXOREnv')
+def register_envs():
+    """Registers the gym_dummy envs with gym.
 
-register(
-    id='TwoInARow-v0',
-    entry_point='gym_dummy.envs.pobs:TwoInARowEnv')
+    Entry points are given as strings, so env modules are only imported once
+    the env is made.
+    """
+    from gym.envs.registration import register
+
+    register(
+        id='GreaterThanZero-v0',
+        entry_point='gym_dummy.envs.fobs:GreaterThanZeroEnv')
+
+    register(
+        id='GreaterThanZero-vec-v0',
+        entry_point='gym_dummy.envs.fobs:VectorGreaterThanZeroEnv')
+
+    if importlib.util.find_spec('jax') is not None:
+        register(
+            id='GreaterThanZero-jax-v0',
+            entry_point='gym_dummy.envs.jax_impl:JaxGreaterThanZeroEnv')
+
+    register(
+        id='NotXOR-v0',
+        entry_point='gym_dummy.envs.fobs:NotXOREnv')
+
+    register(
+        id='TwoInARow-v0',
+        entry_point='gym_dummy.envs.pobs:TwoInARowEnv')
+
+    register(
+        id='TwoInARow-vec-v0',
+        entry_point='gym_dummy.envs.pobs:VectorTwoInARowEnv')
+
+
+# Set GYM_DUMMY_AUTOREG=0 to skip importing gym here, e.g. in workers which
+# only construct envs directly. register_envs() can then be called manually.
+if 'gym' in sys.modules or os.environ.get('GYM_DUMMY_AUTOREG', '1') == '1':
+    register_envs()
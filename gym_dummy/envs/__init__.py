@@ -1,2 +1,4 @@
 from gym_dummy.envs.fobs import GreaterThanZeroEnv
+from gym_dummy.envs.fobs import VectorGreaterThanZeroEnv
 from gym_dummy.envs.pobs import TwoInARowEnv
+from gym_dummy.envs.pobs import VectorTwoInARowEnv
@@ -0,0 +1,58 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Cython step kernels for the dummy envs.
+
+Built by setup.py when Cython is available. Envs fall back to pure Python
+when the extension is not built.
+"""
+from libc.stdint cimport int64_t, uint8_t
+
+import numpy as np
+
+from gym_dummy.envs._rewards import TIAR_REWARD_LUT
+
+# Flattened TIAR_REWARD_LUT, indexed by
+# 4 * has_history + 2 * (last two obs are the same) + action.
+cdef int[8] REWARD_LUT
+for _i, _r in enumerate(TIAR_REWARD_LUT.ravel()):
+    REWARD_LUT[_i] = _r
+
+
+cpdef int tiar_step(int prev_obs, int last_obs, int has_history,
+                    int action) noexcept nogil:
+    """Reward of TwoInARowEnv for taking `action` after `prev_obs, last_obs`.
+
+    `has_history` is False when only a single obs has been seen so far. Only
+    the lowest bit of `action` is used, so an invalid action can never index
+    outside the reward table.
+    """
+    return REWARD_LUT[4 * (has_history != 0) + 2 * (prev_obs == last_obs)
+                      + (action & 1)]
+
+
+def tiar_episode_rewards(const int64_t[:] actions, const uint8_t[:] obs):
+    """Rewards of a whole TwoInARowEnv episode.
+
+    Parameters
+    ----------
+    actions : np.ndarray<int64>
+        Actions taken in the episode, each 0 or 1.
+    obs : np.ndarray<uint8>
+        Observations of the episode, including the initial one. Must hold
+        `len(actions) + 1` entries.
+
+    Returns
+    -------
+    np.ndarray<int64>
+        Reward of each step.
+    """
+    cdef Py_ssize_t t, n = actions.shape[0]
+    if obs.shape[0] < n + 1:
+        raise ValueError('Expected {} observations, got {}'.format(
+            n + 1, obs.shape[0]))
+    rewards = np.empty(n, dtype=np.int64)
+    cdef int64_t[:] r = rewards
+    with nogil:
+        for t in range(n):
+            r[t] = tiar_step(obs[t - 1] if t > 0 else 0, obs[t], t > 0,
+                             actions[t])
+    return rewards
@@ -0,0 +1,90 @@
+"""Numba compiled step and rollout kernels for the dummy envs.
+
+Importing this module requires numba. Envs fall back to their pure Python
+`step` when it is not installed.
+"""
+from numba import njit
+from numba.extending import is_jitted
+import numpy as np
+
+from gym_dummy.envs._rewards import TIAR_REWARD_LUT
+
+
+@njit(cache=True)
+def gtz_step(last_obs, action):
+    """Reward of GreaterThanZeroEnv for taking `action` after `last_obs`."""
+    return 1 - 2 * ((last_obs > 0) ^ (action == 1))
+
+
+@njit(cache=True)
+def tiar_step(prev_obs, last_obs, has_history, action):
+    """Reward of TwoInARowEnv for taking `action` after `prev_obs, last_obs`.
+
+    `has_history` is False when only a single obs has been seen so far.
+    """
+    return TIAR_REWARD_LUT[int(has_history), int(prev_obs == last_obs),
+                           action]
+
+
+@njit
+def gtz_rollout(policy_fn, obs_buf, act_buf):
+    """Runs a full GreaterThanZeroEnv episode.
+
+    Parameters
+    ----------
+    policy_fn : numba.core.registry.CPUDispatcher
+        `@njit` function mapping the last observation to an action.
+    obs_buf : np.ndarray<float32>
+        Filled with the observations of the episode, including the initial
+        one. Its length is the episode length plus one.
+    act_buf : np.ndarray<int8>
+        Filled with the actions taken in the episode.
+
+    Returns
+    -------
+    np.ndarray<int64>
+        Reward of each step.
+    """
+    num_steps = act_buf.shape[0]
+    rewards = np.empty(num_steps, dtype=np.int64)
+    obs_buf[0] = np.random.randn()
+    for t in range(num_steps):
+        action = policy_fn(obs_buf[t])
+        if action != 0 and action != 1:
+            raise ValueError('Invalid action')
+        act_buf[t] = action
+        rewards[t] = gtz_step(obs_buf[t], action)
+        obs_buf[t + 1] = np.random.randn()
+    return rewards
+
+
+@njit
+def tiar_rollout(policy_fn, obs_buf, act_buf):
+    """Runs a full TwoInARowEnv episode.
+
+    Parameters
+    ----------
+    policy_fn : numba.core.registry.CPUDispatcher
+        `@njit` function mapping the last observation to an action.
+    obs_buf : np.ndarray<uint8>
+        Filled with the observations of the episode, including the initial
+        one. Its length is the episode length plus one.
+    act_buf : np.ndarray<int8>
+        Filled with the actions taken in the episode.
+
+    Returns
+    -------
+    np.ndarray<int64>
+        Reward of each step.
+    """
+    num_steps = act_buf.shape[0]
+    rewards = np.empty(num_steps, dtype=np.int64)
+    obs_buf[0] = np.random.randint(0, 2)
+    for t in range(num_steps):
+        action = policy_fn(obs_buf[t])
+        if action != 0 and action != 1:
+            raise ValueError('Invalid action')
+        act_buf[t] = action
+        rewards[t] = tiar_step(obs_buf[t - 1], obs_buf[t], t > 0, action)
+        obs_buf[t + 1] = np.random.randint(0, 2)
+    return rewards
@@ -0,0 +1,7 @@
+"""Reward tables shared by the Python, numba, Cython and JAX envs."""
+import numpy as np
+
+# TwoInARow reward indexed by [has_history, last two obs are the same,
+# action]. With a single obs seen so far, the obs are treated as differing.
+TIAR_REWARD_LUT = np.array([[[1, -1], [1, -1]],
+                            [[1, -1], [-1, 1]]], dtype=np.int8)
@@ -1,10 +1,11 @@
-import logging.config
-import random
+import logging
+import sys
 
 import gym
 from gym import spaces
 import numpy as np
-from tabulate import tabulate
+
+from gym_dummy.vec import SoAVectorEnv
 
 
 class GreaterThanZeroEnv(gym.Env):
@@ -30,23 +31,30 @@ class GreaterThanZeroEnv(gym.Env):
     """
 
     metadata = {'render.modes': ['human']}
+    # Set to False to skip checking actions, e.g. when they are validated
+    # upstream in bulk.
+    validate_actions = True
 
-    def __init__(self, max_steps_per_episode=100):
+    def __init__(self, max_steps_per_episode=100, track_history=False,
+                 auto_reset=True):
         """
         Parameters
         ----------
         max_steps_per_episode : int, default=100
             Maximum allowed steps per episode. This will define how long an
             episode lasts, since the game does not end otherwise.
+        track_history : bool, default=False
+            Whether to record the actions taken in each episode, exposed as
+            `episode_actions`. Off by default so training runs don't pay for
+            it.
+        auto_reset : bool, default=True
+            Whether stepping after the episode is over resets the env instead
+            of raising a RuntimeError. Such a step ignores the action and
+            returns the initial obs of the next episode, a reward of 0 and
+            done set to True, so no transition is learned across episodes.
 
         Attributes
         ----------
-        curr_episode : int
-            Current episode as a count.
-        obs_episode_memory : list<int>
-            History of observations in episode.
-        action_episode_memory : list<int>
-            History of actions taken in episode.
         curr_step : int
             Current timestep in episode, as a count.
         action_space : gym.spaces.Discrete
@@ -57,12 +65,22 @@ class GreaterThanZeroEnv(gym.Env):
         self.max_steps_per_episode = max_steps_per_episode
         self.__version__ = "0.0.2"
         logging.info("GreaterThanZero - Version {}".format(self.__version__))
-        self.curr_episode = -1  # Set to -1 b/c reset() adds 1 to episode
-        self.obs_episode_memory = []
-        self.action_episode_memory = []
-        self.curr_step = 0
+        self.track_history = track_history
+        self.auto_reset = auto_reset
+        self._last_obs = 0.0
+        self._rng = np.random.default_rng()
+        # No episode is in progress until reset(), so a first step() resets
+        # (or raises) instead of returning obs that were never sampled.
+        self.curr_step = max_steps_per_episode
+        # Observations and actions of the current episode. reset() allocates
+        # fresh buffers for every episode, so obs handed out as views into
+        # _obs_buf are never overwritten. All of an episode's observations are
+        # sampled up front, while actions are only valid up to curr_step.
+        self._obs_buf = None
+        self._act_buf = None
         self.action_space = spaces.Discrete(2)
-        self.observation_space = spaces.Box(low=-5.6, high=5.6, shape=(1,))
+        self.observation_space = spaces.Box(
+            low=-5.6, high=5.6, shape=(1,), dtype=np.float32)
 
     def step(self, action):
         """The agent takes a step in the environment.
@@ -75,9 +93,10 @@ class GreaterThanZeroEnv(gym.Env):
         Returns
         -------
         ob, reward, episode_over, info : tuple
-            ob : list
-                A list of ones or zeros which together represent the state of
-                the environment.
+            ob : np.ndarray
+                Observation representing the state of the environment. This is
+                a view into the episode's observation buffer, which is never
+                written to again.
             reward : float
                 Amount of reward achieved by the previous action. The scale
                 varies between environments, but the goal is always to increase
@@ -94,34 +113,46 @@ class GreaterThanZeroEnv(gym.Env):
                 However, official evaluations of your agent are not allowed to
                 use this for learning.
         """
-        done = self.curr_step >= self.max_steps_per_episode
-        if done:
-            raise RuntimeError("Episode is done")
+        if self.curr_step >= self.max_steps_per_episode:
+            if not self.auto_reset:
+                raise RuntimeError("Episode is done")
+            return self.reset(), 0.0, True, {}
         self.curr_step += 1
-        self.action_episode_memory[self.curr_episode].append(action)
-        self._take_action(action)
-        # Recompute done since action may have modified it
         done = self.curr_step >= self.max_steps_per_episode
-        reward = self._get_reward()
+        self._take_action(action)
+        if self.track_history:
+            self._act_buf[self.curr_step - 1] = action
+        reward = self._get_reward(action)
         ob = self._get_obs()
-        self.obs_episode_memory[self.curr_episode].append(ob)
+        self._last_obs = float(ob[0])
         # Perform resets that happen after each timestep
         self._step_reset()
         return ob, reward, done, {}
 
-    def reset(self):
+    def reset(self, *, seed=None):
         """Reset the state of the environment and returns an initial obs..
 
+        Parameters
+        ----------
+        seed : int, optional
+            Seed for the env's random number generator. If None, the current
+            generator keeps being used.
+
         Returns
         -------
         object
             The initial observation of the space.
         """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
         self.curr_step = 0
-        self.curr_episode += 1
-        self.action_episode_memory.append([])
-        initial_obs = [np.random.randn()]
-        self.obs_episode_memory.append([initial_obs])
+        self._obs_buf = self._rng.standard_normal(
+            self.max_steps_per_episode + 1, dtype=np.float32)
+        if self.track_history:
+            self._act_buf = np.empty(
+                self.max_steps_per_episode, dtype=np.int8)
+        initial_obs = self._get_obs()
+        self._last_obs = float(initial_obs[0])
         return initial_obs
 
     def render(self, mode='human'):
@@ -130,6 +161,62 @@ class GreaterThanZeroEnv(gym.Env):
     def close(self):
         pass
 
+    @property
+    def episode_obs(self):
+        """np.ndarray : Observations seen so far in the current episode.
+
+        None before the first reset.
+        """
+        if self._obs_buf is None:
+            return None
+        return self._obs_buf[:self.curr_step + 1]
+
+    @property
+    def episode_actions(self):
+        """np.ndarray<int8> : Actions taken so far in the current episode.
+
+        None unless `track_history` is set, and before the first reset.
+        """
+        if not self.track_history or self._act_buf is None:
+            return None
+        return self._act_buf[:self.curr_step]
+
+    def rollout(self, policy_fn):
+        """Runs a full episode, choosing each action with `policy_fn`.
+
+        The episode runs in a numba compiled kernel when numba is installed
+        and `policy_fn` is itself `@njit` decorated. Otherwise it falls back
+        to calling `reset` and `step` from Python. The compiled kernel samples
+        from numba's own random state, which `reset(seed=...)` does not seed.
+
+        Parameters
+        ----------
+        policy_fn : callable
+            Maps the last observation to an action.
+
+        Returns
+        -------
+        np.ndarray<int64>
+            Reward of each step.
+        """
+        # A jitted policy_fn means numba is already loaded, so there is no
+        # need to pay for importing it otherwise.
+        if 'numba' in sys.modules:
+            from gym_dummy.envs import _jit
+            if _jit.is_jitted(policy_fn):
+                self.curr_step = self.max_steps_per_episode
+                self._obs_buf = np.empty(
+                    self.max_steps_per_episode + 1, dtype=np.float32)
+                self._act_buf = np.empty(
+                    self.max_steps_per_episode, dtype=np.int8)
+                return _jit.gtz_rollout(
+                    policy_fn, self._obs_buf, self._act_buf)
+        rewards = np.empty(self.max_steps_per_episode, dtype=np.int64)
+        ob = self.reset()
+        for t in range(self.max_steps_per_episode):
+            ob, rewards[t], _, _ = self.step(policy_fn(ob[0]))
+        return rewards
+
     def _take_action(self, action):
         """How to change the environment when taking an action.
 
@@ -142,40 +229,35 @@ class GreaterThanZeroEnv(gym.Env):
         -------
         None
         """
-        if action not in [0, 1]:
+        # Any bit other than the lowest one set means action is not 0 or 1
+        if self.validate_actions and action & ~1:
             raise ValueError('Invalid action ', action)
 
-    def _get_reward(self):
+    def _get_reward(self, action):
         """Obtain the reward for the current state of the environment.
 
+        Parameters
+        ----------
+        action : int
+            Action taken in the current state.
+
         Returns
         -------
         float
             Reward.
         """
-        action = self.action_episode_memory[self.curr_episode][-1]
-        last_obs = self.obs_episode_memory[self.curr_episode][-1]
-        if last_obs[0] > 0:
-            if action == 1:
-                r = 1
-            else:
-                r = -1
-        else:
-            if action == 1:
-                r = -1
-            else:
-                r = 1
-        return r
+        # +1 when the action agrees with the sign of the obs, else -1
+        return 1 if (self._last_obs > 0) == (action == 1) else -1
 
     def _get_obs(self):
         """Obtain the observation for the current state of the environment.
 
         Returns
         -------
-        list
-            Observation.
+        np.ndarray
+            Observation, as a view into the episode's observation buffer.
         """
-        return [np.random.randn()]
+        return self._obs_buf[self.curr_step:self.curr_step + 1]
 
     def _step_reset(self):
         """Performs resets that happen after each timestep.
@@ -187,6 +269,86 @@ class GreaterThanZeroEnv(gym.Env):
         pass
 
 
+class VectorGreaterThanZeroEnv(SoAVectorEnv):
+    """Vectorized version of GreaterThanZeroEnv.
+
+    Steps `num_envs` independent replicas of GreaterThanZeroEnv in a single
+    call. See `gym_dummy.vec.SoAVectorEnv` for the step and auto-reset
+    semantics.
+
+    Observation Space
+        `num_envs` continuous numbers randomly sampled from standard normal
+        distribution, one per replica.
+
+    Action Space
+        `num_envs` actions, each either 0 or 1.
+
+    Reward function
+        Same as GreaterThanZeroEnv, applied to each replica independently.
+    """
+
+    obs_dtype = np.float32
+
+    def __init__(self, num_envs=8, max_steps_per_episode=100,
+                 copy_obs=True):
+        """
+        Parameters
+        ----------
+        num_envs : int, default=8
+            Number of replicas stepped in parallel.
+        max_steps_per_episode : int, default=100
+            Maximum allowed steps per episode. This will define how long an
+            episode lasts, since the game does not end otherwise.
+        copy_obs : bool, default=True
+            Whether returned obs are copies rather than views of `last_obs`.
+
+        Attributes
+        ----------
+        single_action_space : gym.spaces.Discrete
+            Action space of a single replica.
+        single_observation_space : gym.spaces.Box
+            Observation space of a single replica.
+        action_space : gym.spaces.MultiDiscrete
+            Action space.
+        observation_space : gym.spaces.Box
+            Observation space.
+        """
+        super().__init__(num_envs, max_steps_per_episode, copy_obs)
+        self.__version__ = "0.0.2"
+        logging.info("VectorGreaterThanZero - Version {}".format(
+            self.__version__))
+        self.single_action_space = spaces.Discrete(2)
+        self.single_observation_space = spaces.Box(
+            low=-5.6, high=5.6, shape=(1,), dtype=np.float32)
+        self.action_space = spaces.MultiDiscrete([2] * num_envs)
+        self.observation_space = spaces.Box(
+            low=-5.6, high=5.6, shape=(num_envs, 1), dtype=np.float32)
+
+    def _get_rewards(self, actions):
+        """Obtain the reward of each replica for the current state.
+
+        Parameters
+        ----------
+        actions : np.ndarray<int>
+            Actions.
+
+        Returns
+        -------
+        np.ndarray<float64>
+            Rewards.
+        """
+        return np.where((self.last_obs > 0) == (actions == 1), 1.0, -1.0)
+
+    def _sample_obs(self):
+        """Samples a new observation for each replica into `last_obs`.
+
+        Returns
+        -------
+        None
+        """
+        self._rng.standard_normal(dtype=np.float32, out=self.last_obs)
+
+
 class NotXOREnv(gym.Env):
     """A Naive OpenAI Gym environment for basic testing of RL agents.
 
@@ -196,7 +358,7 @@ class NotXOREnv(gym.Env):
     observation.
 
     Observation Space
-        Tuple(Discrete(2), Discrete(2))
+        Box(0, 1, (2,), uint8)
         Observation possibilities are [0, 0], [1, 1], [0, 1], [1, 0]
 
     Action Space
@@ -212,40 +374,61 @@ class NotXOREnv(gym.Env):
     """
 
     metadata = {'render.modes': ['human']}
-
-    def __init__(self, max_steps_per_episode=100):
+    # Set to False to skip checking actions, e.g. when they are validated
+    # upstream in bulk.
+    validate_actions = True
+    # Observations whose Q values are reported by q_values()
+    _QV_INPUTS = np.array([[0, 0], [1, 1], [0, 1], [1, 0]])
+    _QV_ROW_LABELS = ('0,0', '1,1', '0,1', '1,0')
+
+    def __init__(self, max_steps_per_episode=100, track_history=False,
+                 auto_reset=True):
         """
         Parameters
         ----------
         max_steps_per_episode : int, default=100
             Maximum allowed steps per episode. This will define how long an
             episode lasts, since the game does not end otherwise.
+        track_history : bool, default=False
+            Whether to record the actions taken in each episode, exposed as
+            `episode_actions`. Off by default so training runs don't pay for
+            it.
+        auto_reset : bool, default=True
+            Whether stepping after the episode is over resets the env instead
+            of raising a RuntimeError. Such a step ignores the action and
+            returns the initial obs of the next episode, a reward of 0 and
+            done set to True, so no transition is learned across episodes.
 
         Attributes
         ----------
-        curr_episode : int
-            Current episode as a count.
-        obs_episode_memory : list<int>
-            History of observations in episode.
-        action_episode_memory : list<int>
-            History of actions taken in episode.
         curr_step : int
             Current timestep in episode, as a count.
         action_space : gym.spaces.Discrete
             Action space.
-        observation_space : gym.spaces.Tuple
+        observation_space : gym.spaces.Box
             Observation space.
         """
         self.max_steps_per_episode = max_steps_per_episode
         self.__version__ = "0.0.2"
         logging.info("NotXOR - Version {}".format(self.__version__))
-        self.curr_episode = -1  # Set to -1 b/c reset() adds 1 to episode
-        self.obs_episode_memory = []
-        self.action_episode_memory = []
-        self.curr_step = 0
+        self.track_history = track_history
+        self.auto_reset = auto_reset
+        # Whether both inputs of the last obs are equal, as a Python bool so
+        # rewards stay off NumPy's scalar path
+        self._last_obs_same = False
+        self._rng = np.random.default_rng()
+        # No episode is in progress until reset(), so a first step() resets
+        # (or raises) instead of returning obs that were never sampled.
+        self.curr_step = max_steps_per_episode
+        # Observations and actions of the current episode. reset() allocates
+        # fresh buffers for every episode, so obs handed out as views into
+        # _obs_buf are never overwritten. All of an episode's observations are
+        # sampled up front, while actions are only valid up to curr_step.
+        self._obs_buf = None
+        self._act_buf = None
         self.action_space = spaces.Discrete(2)
-        self.observation_space = spaces.Tuple([spaces.Discrete(2),
-                                               spaces.Discrete(2)])
+        self.observation_space = spaces.Box(
+            low=0, high=1, shape=(2,), dtype=np.uint8)
 
     def step(self, action):
         """The agent takes a step in the environment.
@@ -258,9 +441,10 @@ class NotXOREnv(gym.Env):
         Returns
         -------
         ob, reward, episode_over, info : tuple
-            ob : list
-                A list of ones or zeros which together represent the state of
-                the environment.
+            ob : np.ndarray
+                Observation representing the state of the environment. This is
+                a view into the episode's observation buffer, which is never
+                written to again.
             reward : float
                 Amount of reward achieved by the previous action. The scale
                 varies between environments, but the goal is always to increase
@@ -277,34 +461,46 @@ class NotXOREnv(gym.Env):
                 However, official evaluations of your agent are not allowed to
                 use this for learning.
         """
-        done = self.curr_step >= self.max_steps_per_episode
-        if done:
-            raise RuntimeError("Episode is done")
+        if self.curr_step >= self.max_steps_per_episode:
+            if not self.auto_reset:
+                raise RuntimeError("Episode is done")
+            return self.reset(), 0.0, True, {}
         self.curr_step += 1
-        self.action_episode_memory[self.curr_episode].append(action)
-        self._take_action(action)
-        # Recompute done since action may have modified it
         done = self.curr_step >= self.max_steps_per_episode
-        reward = self._get_reward()
+        self._take_action(action)
+        if self.track_history:
+            self._act_buf[self.curr_step - 1] = action
+        reward = self._get_reward(action)
         ob = self._get_obs()
-        self.obs_episode_memory[self.curr_episode].append(ob)
+        self._last_obs_same = int(ob[0]) == int(ob[1])
         # Perform resets that happen after each timestep
         self._step_reset()
         return ob, reward, done, {}
 
-    def reset(self):
+    def reset(self, *, seed=None):
         """Reset the state of the environment and returns an initial obs..
 
+        Parameters
+        ----------
+        seed : int, optional
+            Seed for the env's random number generator. If None, the current
+            generator keeps being used.
+
         Returns
         -------
         object
             The initial observation of the space.
         """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
         self.curr_step = 0
-        self.curr_episode += 1
-        self.action_episode_memory.append([])
+        self._obs_buf = self._rng.integers(
+            0, 2, size=(self.max_steps_per_episode + 1, 2), dtype=np.uint8)
+        if self.track_history:
+            self._act_buf = np.empty(
+                self.max_steps_per_episode, dtype=np.int8)
         initial_obs = self._get_obs()
-        self.obs_episode_memory.append([initial_obs])
+        self._last_obs_same = int(initial_obs[0]) == int(initial_obs[1])
         return initial_obs
 
     def render(self, mode='human'):
@@ -313,6 +509,26 @@ class NotXOREnv(gym.Env):
     def close(self):
         pass
 
+    @property
+    def episode_obs(self):
+        """np.ndarray : Observations seen so far in the current episode.
+
+        None before the first reset.
+        """
+        if self._obs_buf is None:
+            return None
+        return self._obs_buf[:self.curr_step + 1]
+
+    @property
+    def episode_actions(self):
+        """np.ndarray<int8> : Actions taken so far in the current episode.
+
+        None unless `track_history` is set, and before the first reset.
+        """
+        if not self.track_history or self._act_buf is None:
+            return None
+        return self._act_buf[:self.curr_step]
+
     def q_values(self, model):
         """Returns a string representation of the Q values for each state.
 
@@ -322,7 +538,7 @@ class NotXOREnv(gym.Env):
         ----------
         model : object
             Model trying to learn q-values of the env. Must have a `predict`
-            method.
+            method, which is called once with a batch of all the inputs.
 
         Returns
         -------
@@ -335,12 +551,11 @@ class NotXOREnv(gym.Env):
         which would call `model.predict()` multiple times and average the
         returned values.
         """
-        inputs = [[0, 0], [1, 1], [0, 1], [1, 0]]
-        preds = [model.predict(inp) for inp in inputs]
-        data = []
-        for i, inp in enumerate(inputs):
-            inp_str = ','.join([str(_inp) for _inp in inp])
-            data.append([inp_str]+list(preds[i][0]))
+        from tabulate import tabulate
+
+        preds = np.asarray(model.predict(self._QV_INPUTS))
+        data = [[label]+list(pred)
+                for label, pred in zip(self._QV_ROW_LABELS, preds)]
         s = tabulate(data, headers=['Obs.', 'Action 0', 'Action 1'])
         s = '\n' + s + '\n'
         return s
@@ -357,41 +572,35 @@ class NotXOREnv(gym.Env):
         -------
         None
         """
-        if action not in [0, 1]:
+        # Any bit other than the lowest one set means action is not 0 or 1
+        if self.validate_actions and action & ~1:
             raise ValueError('Invalid action ', action)
 
-    def _get_reward(self):
+    def _get_reward(self, action):
         """Obtain the reward for the current state of the environment.
 
+        Parameters
+        ----------
+        action : int
+            Action taken in the current state.
+
         Returns
         -------
         float
             Reward.
         """
-        action = self.action_episode_memory[self.curr_episode][-1]
-        last_obs = self.obs_episode_memory[self.curr_episode][-1]
-        if last_obs[0] == last_obs[1]:
-            if action == 1:
-                r = 1
-            else:
-                r = -1
-        else:
-            if action == 0:
-                r = 1
-            else:
-                r = -1
-        return r
+        # +1 when action 1 is taken iff both inputs are equal, else -1
+        return 1 if self._last_obs_same == (action == 1) else -1
 
     def _get_obs(self):
         """Obtain the observation for the current state of the environment.
 
         Returns
         -------
-        list
-            Observation.
+        np.ndarray
+            Observation, as a view into the episode's observation buffer.
         """
-        return [random.choice([0, 1]),
-                random.choice([0, 1])]
+        return self._obs_buf[self.curr_step]
 
     def _step_reset(self):
         """Performs resets that happen after each timestep.
@@ -0,0 +1,246 @@
+"""Pure functional JAX versions of GreaterThanZeroEnv and TwoInARowEnv.
+
+Env state is an immutable NamedTuple (and hence a JAX pytree), so `step` can be
+`jax.jit` compiled and `jax.vmap`ped over thousands of envs on one
+accelerator. Importing this module requires jax.
+"""
+import logging
+from typing import NamedTuple
+
+import gym
+from gym import spaces
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+from gym_dummy.envs._rewards import TIAR_REWARD_LUT
+
+_TIAR_REWARD_LUT = jnp.asarray(TIAR_REWARD_LUT, dtype=jnp.float32)
+
+
+class GTZState(NamedTuple):
+    """State of a GreaterThanZero env."""
+    curr_step: jnp.ndarray
+    last_obs: jnp.ndarray
+
+
+class TIARState(NamedTuple):
+    """State of a TwoInARow env."""
+    curr_step: jnp.ndarray
+    prev_obs: jnp.ndarray
+    last_obs: jnp.ndarray
+
+
+def reset_gtz(key):
+    """Returns the initial state and obs of a GreaterThanZero env."""
+    obs = jax.random.normal(key)
+    return GTZState(jnp.int32(0), obs), obs
+
+
+def step_gtz(state, action, key, max_steps_per_episode=100):
+    """The agent takes a step in a GreaterThanZero env.
+
+    Parameters
+    ----------
+    state : GTZState
+        Current env state.
+    action : int
+        Action to take.
+    key : jax.random.PRNGKey
+        Key used to sample the next obs.
+    max_steps_per_episode : int, default=100
+        Maximum allowed steps per episode.
+
+    Returns
+    -------
+    state, obs, reward, done : tuple
+        state : GTZState
+            Next env state.
+        obs : jnp.float32
+            Next observation.
+        reward : jnp.float32
+            Reward achieved by the action.
+        done : jnp.bool_
+            Whether the episode is over. Stepping past the end of an episode
+            is not checked, callers are expected to reset.
+    """
+    reward = jnp.where((state.last_obs > 0) == (action == 1), 1.0, -1.0)
+    obs = jax.random.normal(key)
+    curr_step = state.curr_step + 1
+    done = curr_step >= max_steps_per_episode
+    return GTZState(curr_step, obs), obs, reward, done
+
+
+def reset_tiar(key):
+    """Returns the initial state and obs of a TwoInARow env."""
+    obs = jax.random.randint(key, (), 0, 2, dtype=jnp.uint8)
+    return TIARState(jnp.int32(0), jnp.zeros_like(obs), obs), obs
+
+
+def step_tiar(state, action, key, max_steps_per_episode=100):
+    """The agent takes a step in a TwoInARow env.
+
+    Parameters
+    ----------
+    state : TIARState
+        Current env state.
+    action : int
+        Action to take.
+    key : jax.random.PRNGKey
+        Key used to sample the next obs.
+    max_steps_per_episode : int, default=100
+        Maximum allowed steps per episode.
+
+    Returns
+    -------
+    state, obs, reward, done : tuple
+        state : TIARState
+            Next env state.
+        obs : jnp.uint8
+            Next observation.
+        reward : jnp.float32
+            Reward achieved by the action.
+        done : jnp.bool_
+            Whether the episode is over. Stepping past the end of an episode
+            is not checked, callers are expected to reset.
+    """
+    has_history = (state.curr_step > 0).astype(jnp.int32)
+    same = (state.prev_obs == state.last_obs).astype(jnp.int32)
+    reward = _TIAR_REWARD_LUT[has_history, same, action]
+    obs = jax.random.randint(key, (), 0, 2, dtype=jnp.uint8)
+    curr_step = state.curr_step + 1
+    done = curr_step >= max_steps_per_episode
+    return TIARState(curr_step, state.last_obs, obs), obs, reward, done
+
+
+def autoreset_step_gtz(state, action, key, max_steps_per_episode=100):
+    """Same as `step_gtz`, but resets the env when its episode is over.
+
+    Observations are independent of the step, so the obs just sampled doubles
+    as the initial obs of the next episode. Mirrors the auto-reset of
+    `gym_dummy.vec.SoAVectorEnv`.
+    """
+    state, obs, reward, done = step_gtz(
+        state, action, key, max_steps_per_episode)
+    state = state._replace(curr_step=jnp.where(done, 0, state.curr_step))
+    return state, obs, reward, done
+
+
+vmap_reset_gtz = jax.jit(jax.vmap(reset_gtz))
+vmap_step_gtz = jax.jit(jax.vmap(step_gtz, in_axes=(0, 0, 0, None)),
+                        static_argnums=3)
+vmap_autoreset_step_gtz = jax.jit(
+    jax.vmap(autoreset_step_gtz, in_axes=(0, 0, 0, None)), static_argnums=3)
+vmap_reset_tiar = jax.jit(jax.vmap(reset_tiar))
+vmap_step_tiar = jax.jit(jax.vmap(step_tiar, in_axes=(0, 0, 0, None)),
+                         static_argnums=3)
+
+
+class JaxGreaterThanZeroEnv(gym.Env):
+    """Vectorized GreaterThanZeroEnv backed by `vmap_autoreset_step_gtz`.
+
+    Same interface as VectorGreaterThanZeroEnv, including `(num_envs, 1)` obs
+    and in-place reset of finished replicas, but all replicas are stepped in a
+    single compiled JAX call, on an accelerator if one is available.
+    """
+
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, num_envs=8, max_steps_per_episode=100, seed=None):
+        """
+        Parameters
+        ----------
+        num_envs : int, default=8
+            Number of replicas stepped in parallel.
+        max_steps_per_episode : int, default=100
+            Maximum allowed steps per episode. This will define how long an
+            episode lasts, since the game does not end otherwise.
+        seed : int, optional
+            Seed of the JAX PRNG key. If None, a seed is drawn from OS
+            entropy, so each instance produces a different stream.
+
+        Attributes
+        ----------
+        state : GTZState
+            Batched state of all replicas.
+        action_space : gym.spaces.MultiDiscrete
+            Action space.
+        observation_space : gym.spaces.Box
+            Observation space.
+        """
+        self.num_envs = num_envs
+        self.max_steps_per_episode = max_steps_per_episode
+        self.__version__ = "0.0.1"
+        logging.info("JaxGreaterThanZero - Version {}".format(
+            self.__version__))
+        if seed is None:
+            seed = int(np.random.SeedSequence().generate_state(1)[0])
+        self._key = jax.random.PRNGKey(seed)
+        self.state = None
+        self.action_space = spaces.MultiDiscrete([2] * num_envs)
+        self.observation_space = spaces.Box(
+            low=-5.6, high=5.6, shape=(num_envs, 1), dtype=np.float32)
+
+    def step_batch(self, actions):
+        """All replicas take a step in the environment.
+
+        Parameters
+        ----------
+        actions : array_like<int>
+            Action to take in each replica, of shape `(num_envs,)`.
+
+        Returns
+        -------
+        obs, rewards, dones, info : tuple
+            obs : jnp.ndarray<float32>
+                Observation of each replica, of shape `(num_envs, 1)`.
+            rewards : jnp.ndarray<float32>
+                Reward achieved by each replica's previous action.
+            dones : jnp.ndarray<bool>
+                Whether each replica's episode is over.
+            info : dict
+                Diagnostic information useful for debugging.
+        """
+        self.state, obs, rewards, dones = vmap_autoreset_step_gtz(
+            self.state, jnp.asarray(actions), self._split_keys(),
+            self.max_steps_per_episode)
+        return obs[:, None], rewards, dones, {}
+
+    step = step_batch
+
+    def reset(self, *, seed=None):
+        """Reset the state of all replicas and returns their initial obs.
+
+        Parameters
+        ----------
+        seed : int, optional
+            Seed of the JAX PRNG key. If None, the current key keeps being
+            split.
+
+        Returns
+        -------
+        jnp.ndarray<float32>
+            The initial observation of each replica, of shape
+            `(num_envs, 1)`.
+        """
+        if seed is not None:
+            self._key = jax.random.PRNGKey(seed)
+        self.state, obs = vmap_reset_gtz(self._split_keys())
+        return obs[:, None]
+
+    def render(self, mode='human'):
+        return
+
+    def close(self):
+        pass
+
+    def _split_keys(self):
+        """Advances the PRNG key and returns one subkey per replica.
+
+        Returns
+        -------
+        jnp.ndarray
+            Keys of shape `(num_envs, 2)`.
+        """
+        self._key, subkey = jax.random.split(self._key)
+        return jax.random.split(subkey, self.num_envs)
@@ -1,9 +1,17 @@
-import logging.config
-import random
+import logging
+import sys
 
 import gym
 from gym import spaces
-from tabulate import tabulate
+import numpy as np
+
+from gym_dummy.envs._rewards import TIAR_REWARD_LUT
+from gym_dummy.vec import SoAVectorEnv
+
+try:
+    from gym_dummy.envs._ckernels import tiar_step
+except ImportError:
+    tiar_step = None
 
 
 class TwoInARowEnv(gym.Env):
@@ -14,7 +22,7 @@ class TwoInARowEnv(gym.Env):
     otherwise.
 
     Observation Space
-        2 possible observations: 0 or 1
+        2 possible observations: 0 or 1, as uint8
 
     Action Space
     2 possible actions: 0 or 1
@@ -29,39 +37,64 @@ class TwoInARowEnv(gym.Env):
     """
 
     metadata = {'render.modes': ['human']}
+    # Set to False to skip checking actions, e.g. when they are validated
+    # upstream in bulk.
+    validate_actions = True
+    # Reward indexed by [has_history][last two obs are the same][action], as
+    # nested tuples, which are cheaper to index with Python ints than the
+    # TIAR_REWARD_LUT ndarray
+    _REWARD_LUT = tuple(tuple(map(tuple, r)) for r in TIAR_REWARD_LUT.tolist())
+    # Observation sequences whose Q values are reported by q_values()
+    _QV_INPUTS = np.array([[[0], [0]], [[1], [1]], [[0], [1]], [[1], [0]]])
+    _QV_ROW_LABELS = ('0,0', '1,1', '0,1', '1,0')
 
-    def __init__(self, max_steps_per_episode=100):
+    def __init__(self, max_steps_per_episode=100, track_history=False,
+                 auto_reset=True):
         """
         Parameters
         ----------
         max_steps_per_episode : int, default=100
             Maximum allowed steps per episode. This will define how long an
             episode lasts, since the game does not end otherwise.
+        track_history : bool, default=False
+            Whether to record the actions taken in each episode, exposed as
+            `episode_actions`. Off by default so training runs don't pay for
+            it.
+        auto_reset : bool, default=True
+            Whether stepping after the episode is over resets the env instead
+            of raising a RuntimeError. Such a step ignores the action and
+            returns the initial obs of the next episode, a reward of 0 and
+            done set to True, so no transition is learned across episodes.
 
         Attributes
         ----------
-        curr_episode : int
-            Current episode as a count.
-        obs_episode_memory : list<int>
-            History of observations in episode.
-        action_episode_memory : list<int>
-            History of actions taken in episode.
         curr_step : int
             Current timestep in episode, as a count.
         action_space : gym.spaces.Discrete
             Action space.
-        observation_space : gym.spaces.Discrete
+        observation_space : gym.spaces.Box
             Observation space.
         """
         self.max_steps_per_episode = max_steps_per_episode
         self.__version__ = "0.0.2"
         logging.info("TwoInARow - Version {}".format(self.__version__))
-        self.curr_episode = -1  # Set to -1 b/c reset() adds 1 to episode
-        self.obs_episode_memory = []
-        self.action_episode_memory = []
-        self.curr_step = 0
+        self.track_history = track_history
+        self.auto_reset = auto_reset
+        self._last_obs = 0
+        self._prev_obs = 0
+        self._rng = np.random.default_rng()
+        # No episode is in progress until reset(), so a first step() resets
+        # (or raises) instead of returning obs that were never sampled.
+        self.curr_step = max_steps_per_episode
+        # Observations and actions of the current episode. reset() allocates
+        # fresh buffers for every episode, so obs handed out as views into
+        # _obs_buf are never overwritten. All of an episode's observations are
+        # sampled up front, while actions are only valid up to curr_step.
+        self._obs_buf = None
+        self._act_buf = None
         self.action_space = spaces.Discrete(2)
-        self.observation_space = spaces.Discrete(2)
+        self.observation_space = spaces.Box(
+            low=0, high=1, shape=(1,), dtype=np.uint8)
 
     def step(self, action):
         """The agent takes a step in the environment.
@@ -74,9 +107,10 @@ class TwoInARowEnv(gym.Env):
         Returns
         -------
         ob, reward, episode_over, info : tuple
-            ob : list
-                A list of ones or zeros which together represent the state of
-                the environment.
+            ob : np.ndarray
+                Observation representing the state of the environment. This is
+                a view into the episode's observation buffer, which is never
+                written to again.
             reward : float
                 Amount of reward achieved by the previous action. The scale
                 varies between environments, but the goal is always to increase
@@ -93,34 +127,46 @@ class TwoInARowEnv(gym.Env):
                 However, official evaluations of your agent are not allowed to
                 use this for learning.
         """
-        done = self.curr_step >= self.max_steps_per_episode
-        if done:
-            raise RuntimeError("Episode is done")
+        if self.curr_step >= self.max_steps_per_episode:
+            if not self.auto_reset:
+                raise RuntimeError("Episode is done")
+            return self.reset(), 0.0, True, {}
         self.curr_step += 1
-        self.action_episode_memory[self.curr_episode].append(action)
-        self._take_action(action)
-        # Recompute done since action may have modified it
         done = self.curr_step >= self.max_steps_per_episode
-        reward = self._get_reward()
+        self._take_action(action)
+        if self.track_history:
+            self._act_buf[self.curr_step - 1] = action
+        reward = self._get_reward(action)
         ob = self._get_obs()
-        self.obs_episode_memory[self.curr_episode].append(ob)
+        self._prev_obs, self._last_obs = self._last_obs, int(ob[0])
         # Perform resets that happen after each timestep
         self._step_reset()
         return ob, reward, done, {}
 
-    def reset(self):
+    def reset(self, *, seed=None):
         """Reset the state of the environment and returns an initial obs..
 
+        Parameters
+        ----------
+        seed : int, optional
+            Seed for the env's random number generator. If None, the current
+            generator keeps being used.
+
         Returns
         -------
         object
             The initial observation of the space.
         """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
         self.curr_step = 0
-        self.curr_episode += 1
-        self.action_episode_memory.append([])
+        self._obs_buf = self._rng.integers(
+            0, 2, size=self.max_steps_per_episode + 1, dtype=np.uint8)
+        if self.track_history:
+            self._act_buf = np.empty(
+                self.max_steps_per_episode, dtype=np.int8)
         initial_obs = self._get_obs()
-        self.obs_episode_memory.append([initial_obs])
+        self._last_obs = int(initial_obs[0])
         return initial_obs
 
     def render(self, mode='human'):
@@ -129,6 +175,62 @@ class TwoInARowEnv(gym.Env):
     def close(self):
         pass
 
+    @property
+    def episode_obs(self):
+        """np.ndarray : Observations seen so far in the current episode.
+
+        None before the first reset.
+        """
+        if self._obs_buf is None:
+            return None
+        return self._obs_buf[:self.curr_step + 1]
+
+    @property
+    def episode_actions(self):
+        """np.ndarray<int8> : Actions taken so far in the current episode.
+
+        None unless `track_history` is set, and before the first reset.
+        """
+        if not self.track_history or self._act_buf is None:
+            return None
+        return self._act_buf[:self.curr_step]
+
+    def rollout(self, policy_fn):
+        """Runs a full episode, choosing each action with `policy_fn`.
+
+        The episode runs in a numba compiled kernel when numba is installed
+        and `policy_fn` is itself `@njit` decorated. Otherwise it falls back
+        to calling `reset` and `step` from Python. The compiled kernel samples
+        from numba's own random state, which `reset(seed=...)` does not seed.
+
+        Parameters
+        ----------
+        policy_fn : callable
+            Maps the last observation to an action.
+
+        Returns
+        -------
+        np.ndarray<int64>
+            Reward of each step.
+        """
+        # A jitted policy_fn means numba is already loaded, so there is no
+        # need to pay for importing it otherwise.
+        if 'numba' in sys.modules:
+            from gym_dummy.envs import _jit
+            if _jit.is_jitted(policy_fn):
+                self.curr_step = self.max_steps_per_episode
+                self._obs_buf = np.empty(
+                    self.max_steps_per_episode + 1, dtype=np.uint8)
+                self._act_buf = np.empty(
+                    self.max_steps_per_episode, dtype=np.int8)
+                return _jit.tiar_rollout(
+                    policy_fn, self._obs_buf, self._act_buf)
+        rewards = np.empty(self.max_steps_per_episode, dtype=np.int64)
+        ob = self.reset()
+        for t in range(self.max_steps_per_episode):
+            ob, rewards[t], _, _ = self.step(policy_fn(ob[0]))
+        return rewards
+
     def q_values(self, model):
         """Returns a string representation of the Q values for each state.
 
@@ -138,7 +240,7 @@ class TwoInARowEnv(gym.Env):
         ----------
         model : object
             Model trying to learn q-values of the env. Must have a `predict`
-            method.
+            method, which is called once with a batch of all the inputs.
 
         Returns
         -------
@@ -151,12 +253,11 @@ class TwoInARowEnv(gym.Env):
         which would call `model.predict()` multiple times and average the
         returned values.
         """
-        inputs = [[[0], [0]], [[1], [1]], [[0], [1]], [[1], [0]]]
-        preds = [model.predict(inp) for inp in inputs]
-        data = []
-        for i, inp in enumerate(inputs):
-            inp_str = ','.join([str(_inp[0]) for _inp in inp])
-            data.append([inp_str]+list(preds[i][0]))
+        from tabulate import tabulate
+
+        preds = np.asarray(model.predict(self._QV_INPUTS))
+        data = [[label]+list(pred)
+                for label, pred in zip(self._QV_ROW_LABELS, preds)]
         s = tabulate(data, headers=['Obs. Seq', 'Action 0', 'Action 1'])
         s = '\n' + s + '\n'
         return s
@@ -173,46 +274,42 @@ class TwoInARowEnv(gym.Env):
         -------
         None
         """
-        if action not in [0, 1]:
+        # Any bit other than the lowest one set means action is not 0 or 1
+        if self.validate_actions and action & ~1:
             raise ValueError('Invalid action ', action)
 
-    def _get_reward(self):
+    def _get_reward(self, action):
         """Obtain the reward for the current state of the environment.
 
+        Parameters
+        ----------
+        action : int
+            Action taken in the current state.
+
         Returns
         -------
         float
             Reward.
         """
-        action = self.action_episode_memory[self.curr_episode][-1]
-        if len(self.obs_episode_memory[self.curr_episode]) < 2:
-            if action == 0:
-                r = 1
-            else:
-                r = -1
-        else:
-            last_n_obs = self.obs_episode_memory[self.curr_episode][-2:]
-            if last_n_obs[0] == last_n_obs[1]:
-                if action == 1:
-                    r = 1
-                else:
-                    r = -1
-            else:
-                if action == 0:
-                    r = 1
-                else:
-                    r = -1
-        return r
+        # Only the lowest bit is used, so bool actions index like 0 and 1
+        action = action & 1
+        if tiar_step is not None:
+            return tiar_step(self._prev_obs, self._last_obs,
+                             self.curr_step >= 2, action)
+        has_history = int(self.curr_step >= 2)
+        # 1 when the obs are the same
+        same = self._prev_obs ^ self._last_obs ^ 1
+        return self._REWARD_LUT[has_history][same][action]
 
     def _get_obs(self):
         """Obtain the observation for the current state of the environment.
 
         Returns
         -------
-        list
-            Observation.
+        np.ndarray
+            Observation, as a view into the episode's observation buffer.
         """
-        return [random.choice([0, 1])]
+        return self._obs_buf[self.curr_step:self.curr_step + 1]
 
     def _step_reset(self):
         """Performs resets that happen after each timestep.
@@ -222,3 +319,88 @@ class TwoInARowEnv(gym.Env):
         None
         """
         pass
+
+
+class VectorTwoInARowEnv(SoAVectorEnv):
+    """Vectorized version of TwoInARowEnv.
+
+    Steps `num_envs` independent replicas of TwoInARowEnv in a single call.
+    See `gym_dummy.vec.SoAVectorEnv` for the step and auto-reset semantics.
+
+    Observation Space
+        `num_envs` observations, each either 0 or 1, as uint8.
+
+    Action Space
+        `num_envs` actions, each either 0 or 1.
+
+    Reward function
+        Same as TwoInARowEnv, applied to each replica independently.
+    """
+
+    obs_dtype = np.uint8
+
+    def __init__(self, num_envs=8, max_steps_per_episode=100,
+                 copy_obs=True):
+        """
+        Parameters
+        ----------
+        num_envs : int, default=8
+            Number of replicas stepped in parallel.
+        max_steps_per_episode : int, default=100
+            Maximum allowed steps per episode. This will define how long an
+            episode lasts, since the game does not end otherwise.
+        copy_obs : bool, default=True
+            Whether returned obs are copies rather than views of `last_obs`.
+
+        Attributes
+        ----------
+        prev_obs : np.ndarray<uint8>
+            Second to last observation of each replica.
+        single_action_space : gym.spaces.Discrete
+            Action space of a single replica.
+        single_observation_space : gym.spaces.Box
+            Observation space of a single replica.
+        action_space : gym.spaces.MultiDiscrete
+            Action space.
+        observation_space : gym.spaces.Box
+            Observation space.
+        """
+        super().__init__(num_envs, max_steps_per_episode, copy_obs)
+        self.__version__ = "0.0.2"
+        logging.info("VectorTwoInARow - Version {}".format(self.__version__))
+        self.prev_obs = np.zeros(num_envs, dtype=np.uint8)
+        self.single_action_space = spaces.Discrete(2)
+        self.single_observation_space = spaces.Box(
+            low=0, high=1, shape=(1,), dtype=np.uint8)
+        self.action_space = spaces.MultiDiscrete([2] * num_envs)
+        self.observation_space = spaces.Box(
+            low=0, high=1, shape=(num_envs, 1), dtype=np.uint8)
+
+    def _get_rewards(self, actions):
+        """Obtain the reward of each replica for the current state.
+
+        Parameters
+        ----------
+        actions : np.ndarray<int>
+            Actions.
+
+        Returns
+        -------
+        np.ndarray<float64>
+            Rewards.
+        """
+        has_history = (self.curr_step > 0).astype(np.intp)
+        same = self.prev_obs ^ self.last_obs ^ 1
+        rewards = TIAR_REWARD_LUT[has_history, same, actions]
+        return rewards.astype(np.float64)
+
+    def _sample_obs(self):
+        """Samples a new observation for each replica into `last_obs`.
+
+        Returns
+        -------
+        None
+        """
+        self.prev_obs[:] = self.last_obs
+        self.last_obs[:] = self._rng.integers(
+            0, 2, size=self.num_envs, dtype=np.uint8)
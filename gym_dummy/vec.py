@@ -0,0 +1,169 @@
+import gym
+import numpy as np
+
+
+class SoAVectorEnv(gym.Env):
+    """Base class for in-process vectorized envs.
+
+    State of all `num_envs` replicas is stored as a struct of numpy arrays
+    (one entry per replica), so a step costs a handful of numpy ufunc calls
+    regardless of the number of replicas. Observations are returned as a
+    contiguous `(num_envs, 1)` array, ready to be fed to a policy.
+
+    Replicas whose episode ends are reset in place, and the obs returned for
+    them is the initial obs of their next episode.
+
+    Subclasses must set `obs_dtype` and implement `_get_rewards` and
+    `_sample_obs`.
+    """
+
+    metadata = {'render.modes': ['human']}
+    obs_dtype = np.float32
+    # Set to False to skip checking actions, e.g. when they are validated
+    # upstream.
+    validate_actions = True
+
+    def __init__(self, num_envs=8, max_steps_per_episode=100,
+                 copy_obs=True):
+        """
+        Parameters
+        ----------
+        num_envs : int, default=8
+            Number of replicas stepped in parallel.
+        max_steps_per_episode : int, default=100
+            Maximum allowed steps per episode. This will define how long an
+            episode lasts, since the game does not end otherwise.
+        copy_obs : bool, default=True
+            Whether `step` and `reset` return a fresh obs array. If False,
+            they return a view of `last_obs`, which the next step overwrites,
+            so callers must copy any obs they keep.
+
+        Attributes
+        ----------
+        curr_step : np.ndarray<int32>
+            Current timestep in episode of each replica, as a count.
+        last_obs : np.ndarray
+            Last observation of each replica, of dtype `obs_dtype`.
+        """
+        self.num_envs = num_envs
+        self.max_steps_per_episode = max_steps_per_episode
+        self.copy_obs = copy_obs
+        self._rng = np.random.default_rng()
+        self.curr_step = np.zeros(num_envs, dtype=np.int32)
+        self.last_obs = np.zeros(num_envs, dtype=self.obs_dtype)
+
+    def step(self, actions):
+        """All replicas take a step in the environment.
+
+        Parameters
+        ----------
+        actions : np.ndarray<int>
+            Action to take in each replica, of shape `(num_envs,)`.
+
+        Returns
+        -------
+        obs, rewards, dones, info : tuple
+            obs : np.ndarray
+                Observation of each replica, of shape `(num_envs, 1)`. See
+                `copy_obs` for whether it is a copy or a view of `last_obs`.
+            rewards : np.ndarray<float64>
+                Reward achieved by each replica's previous action.
+            dones : np.ndarray<bool>
+                Whether each replica's episode is over.
+            info : dict
+                Diagnostic information useful for debugging.
+        """
+        actions = np.asarray(actions)
+        self._take_action(actions)
+        rewards = self._get_rewards(actions)
+        self.curr_step += 1
+        self._sample_obs()
+        dones = self.curr_step >= self.max_steps_per_episode
+        # Observations are independent of the step, so the obs just sampled
+        # for finished replicas doubles as the initial obs of their next
+        # episode.
+        self.curr_step[dones] = 0
+        return self._get_obs(), rewards, dones, {}
+
+    step_batch = step
+
+    def reset(self, *, seed=None):
+        """Reset the state of all replicas and returns their initial obs.
+
+        Parameters
+        ----------
+        seed : int, optional
+            Seed for the random number generator shared by all replicas, which
+            samples their observations as one batch. If None, the current
+            generator keeps being used.
+
+        Returns
+        -------
+        np.ndarray
+            The initial observation of each replica, of shape
+            `(num_envs, 1)`.
+        """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        self.curr_step[:] = 0
+        self._sample_obs()
+        return self._get_obs()
+
+    def render(self, mode='human'):
+        return
+
+    def close(self):
+        pass
+
+    def _take_action(self, actions):
+        """Validates the actions taken by each replica.
+
+        Parameters
+        ----------
+        actions : np.ndarray<int>
+            Actions.
+
+        Returns
+        -------
+        None
+        """
+        if self.validate_actions and (actions & ~1).any():
+            raise ValueError('Invalid action ', actions)
+
+    def _get_obs(self):
+        """Obtain the observation of each replica.
+
+        Returns
+        -------
+        np.ndarray
+            `last_obs` as a `(num_envs, 1)` array, copied unless `copy_obs` is
+            False.
+        """
+        obs = self.last_obs[:, None]
+        return obs.copy() if self.copy_obs else obs
+
+    def _get_rewards(self, actions):
+        """Obtain the reward of each replica for the current state.
+
+        Called before `curr_step` is incremented and new obs are sampled.
+
+        Parameters
+        ----------
+        actions : np.ndarray<int>
+            Actions.
+
+        Returns
+        -------
+        np.ndarray<float64>
+            Rewards.
+        """
+        raise NotImplementedError
+
+    def _sample_obs(self):
+        """Samples a new observation for each replica into `last_obs`.
+
+        Returns
+        -------
+        None
+        """
+        raise NotImplementedError
@@ -1,9 +1,27 @@
 from setuptools import setup
 
+try:
+    import Cython
+    from Cython.Build import cythonize
+except ImportError:
+    Cython = None
+
+# _ckernels.pyx uses `noexcept`, which needs Cython 3. Envs fall back to pure
+# Python kernels without the extension.
+if Cython is not None and int(Cython.__version__.split('.')[0]) >= 3:
+    ext_modules = cythonize(['gym_dummy/envs/_ckernels.pyx'])
+else:
+    ext_modules = []
+
 setup(name='gym_dummy',
       version='0.0.3',
       install_requires=[
           'gym',
-          'numpy',
+          'numpy>=1.17',
           'tabulate',
-      ])
+      ],
+      extras_require={
+          'jit': ['numba'],
+          'jax': ['jax'],
+      },
+      ext_modules=ext_modules)
@@ -0,0 +1,75 @@
+"""Checks that every TwoInARow reward backend agrees with TwoInARowEnv.
+
+Backends whose optional dependency (numba, jax or the Cython extension) is
+missing are skipped.
+"""
+import numpy as np
+import pytest
+
+from gym_dummy.envs import pobs
+
+NUM_STEPS = 200
+
+
+def _run_episode():
+    """Steps a seeded TwoInARowEnv episode with seeded random actions.
+
+    Returns
+    -------
+    obs, actions, rewards : tuple
+        obs : np.ndarray<uint8>
+            Observations of the episode, including the initial one.
+        actions : np.ndarray<int64>
+            Actions taken.
+        rewards : np.ndarray<int64>
+            Reward of each step.
+    """
+    env = pobs.TwoInARowEnv(max_steps_per_episode=NUM_STEPS,
+                            track_history=True)
+    env.reset(seed=0)
+    actions = np.random.default_rng(1).integers(0, 2, NUM_STEPS)
+    rewards = np.array([env.step(int(a))[1] for a in actions])
+    return env.episode_obs.copy(), actions, rewards
+
+
+@pytest.fixture
+def episode(monkeypatch):
+    """Episode stepped with the pure Python reward table."""
+    monkeypatch.setattr(pobs, 'tiar_step', None)
+    return _run_episode()
+
+
+def test_cython(episode, monkeypatch):
+    _ckernels = pytest.importorskip('gym_dummy.envs._ckernels')
+    obs, actions, rewards = episode
+    np.testing.assert_array_equal(
+        _ckernels.tiar_episode_rewards(actions, obs), rewards)
+    monkeypatch.setattr(pobs, 'tiar_step', _ckernels.tiar_step)
+    np.testing.assert_array_equal(_run_episode()[2], rewards)
+
+
+def test_numba(episode):
+    pytest.importorskip('numba')
+    from gym_dummy.envs import _jit
+
+    obs, actions, rewards = episode
+    jit_rewards = [_jit.tiar_step(obs[t - 1] if t > 0 else 0, obs[t], t > 0,
+                                  actions[t])
+                   for t in range(NUM_STEPS)]
+    np.testing.assert_array_equal(jit_rewards, rewards)
+
+
+def test_jax(episode):
+    jax = pytest.importorskip('jax')
+    from gym_dummy.envs import jax_impl
+
+    obs, actions, rewards = episode
+    # One replica per step, each in the state the env was in at that step
+    state = jax_impl.TIARState(
+        curr_step=np.arange(NUM_STEPS, dtype=np.int32),
+        prev_obs=np.concatenate([[0], obs[:NUM_STEPS - 1]]).astype(np.uint8),
+        last_obs=obs[:NUM_STEPS])
+    keys = jax.random.split(jax.random.PRNGKey(0), NUM_STEPS)
+    _, _, jax_rewards, _ = jax_impl.vmap_step_tiar(
+        state, actions, keys, NUM_STEPS)
+    np.testing.assert_array_equal(np.asarray(jax_rewards), rewards)